@@ -23,6 +23,9 @@ LOGO_PATH = r'./assets/images/logo.png'
 REP_URL = r'https://github.com/gonzagrau/LungoVax'
 TITLE = 'LungoVax'
 SIM_TIME = 10.0
+# every simulation runs over the same time samples, built once. They stay in float64 so that the clamps are
+# sampled at the exact instants; only the simulation results are stored in lung.DTYPE
+TIME_VECTOR = np.linspace(0, SIM_TIME, 1500)
 RIPPLE_N = 25
 PULMONARY_COMPLIANCE_RANGE = [50, 200]
 THORACIC_COMPLIANCE_RANGE = [200, 400]
@@ -357,7 +360,7 @@ class AssistedRespirationInputsFrame(ctk.CTkFrame):
         return func_list, end_times, pauses
 
     def run_sim(self):
-        time_vector = np.linspace(0, SIM_TIME, 1500)
+        time_vector = TIME_VECTOR
         capacitances, resistances = self.get_params()
         resistances = np.array(resistances)/1000.  # Converting between cmH20/(Ls) to cmH20/(mLs)
         clamping_functions, end_times, pauses = self.get_clamping_funcs()
@@ -630,6 +633,11 @@ class AssistedRespirationGraphFrame(ctk.CTkFrame):
         super().__init__(master, **kwargs)
         # The following label is here just to show the other developers my layout ideas
         # The only widget in this frame should be the matplotlib figure
+
+        # The plotting functions return the same figure on every call, so each figure keeps the canvas it was
+        # first embedded in, keyed by the figure label. Wrapping a figure in a new canvas would scale its dpi
+        # once more on every run with display scaling
+        self.canvases = {}
         self.set_initial_graph()
 
     def set_initial_graph(self):
@@ -638,13 +646,21 @@ class AssistedRespirationGraphFrame(ctk.CTkFrame):
         v, f, p = lung.pressure_clamp_sim(time_array=np.linspace(0, 5, 10), compliance=1, resistance=1,
                                           pressure_function=lambda t: 0)
         empty_graphs_fig = lung.comparative_plot(empty_T, v, v, f, f, p, p, False, LANG_PACK)
-        empty_graphs = FigureCanvasTkAgg(empty_graphs_fig, self)
-        empty_graphs.get_tk_widget().pack(expand=True, fill=ctk.BOTH)
+        self.plot_simulation(empty_graphs_fig)
 
     def plot_simulation(self, updated_figure):
-        for widget in self.winfo_children():
-            widget.destroy()
-        graphs = FigureCanvasTkAgg(updated_figure, self)
+        graphs = self.canvases.get(updated_figure.get_label())
+        if graphs is not None and graphs.figure is updated_figure:
+            graphs.draw_idle()
+        else:
+            # first figure with this label, or a new one replacing it (e.g. after a change of appearance)
+            if graphs is not None:
+                graphs.get_tk_widget().destroy()
+            graphs = FigureCanvasTkAgg(updated_figure, self)
+            self.canvases[updated_figure.get_label()] = graphs
+        for other in self.canvases.values():
+            if other is not graphs:
+                other.get_tk_widget().pack_forget()
         graphs.get_tk_widget().pack(expand=True, fill=ctk.BOTH)
 
 
@@ -12,18 +12,26 @@ class FunctionArray(object):
     def append(self, func: Callable) -> None:
         self.functions.append(func)
 
-    def __call__(self, *args, **kwargs) -> np.ndarray:
-        return np.array([f(*args, **kwargs) for f in self.functions])
+    def __call__(self, *args, out: np.ndarray = None, **kwargs) -> np.ndarray:
+        if out is None:
+            return np.array([f(*args, **kwargs) for f in self.functions])
+        # write into a buffer owned by the caller, so no new array is allocated
+        for i, f in enumerate(self.functions):
+            out[i] = f(*args, **kwargs)
+        return out
 
     def __len__(self) -> int:
         return len(self.functions)
 
 
-def ruku4(T: np.ndarray, F: FunctionArray, X_0: np.ndarray) -> np.ndarray:
+def ruku4(T: np.ndarray, F: FunctionArray | Callable, X_0: np.ndarray, inplace: bool = False) -> np.ndarray:
     """
     :param np.ndarray T: time array of len N, defined as the range a:h:b
-    :param np.ndarray F: array of functions of len M
+    :param FunctionArray|Callable F: array of functions of len M, or a single function F(t, X) returning
+    all M derivatives at once as an array, which saves one Python call per equation
     :param np.ndarray X_0: array of initial conditions at T[0]
+    :param bool inplace: if True, the single function is called as F(t, X, out) and writes the M derivatives
+    into out instead of returning a new array
 
     Uses the Runge-Kutta 4 method to solve the following system of differential equations:
     dX/dt = F(T, X(T))
@@ -36,18 +44,52 @@ def ruku4(T: np.ndarray, F: FunctionArray, X_0: np.ndarray) -> np.ndarray:
     :return np.ndarray: X, an array of dimensions M x N with the values of each X[i] at T[j]
     """
     h = T[1] - T[0]
+    half_h, sixth_h = h / 2, h / 6
     N = len(T)
-    M = len(F)
+    M = len(X_0)
+    if isinstance(F, FunctionArray) and len(F) != M:
+        raise ValueError("The number of functions and initial conditions do not match")
     X = np.zeros((N, M))
     X[0, :] = X_0
 
+    # every F is called as F(t, X, out), with the output buffer passed positionally
+    if isinstance(F, FunctionArray):
+        functions = F
+
+        def F(t, X, out):
+            return functions(t, X, out=out)
+    elif not inplace:
+        f = F
+
+        def F(t, X, out):
+            out[:] = f(t, X)
+            return out
+
+    # the stages are written into buffers allocated once, instead of new arrays at every step
+    k1, k2, k3, k4 = np.empty((4, M))
+    tmp = np.empty(M)
+
     for j in range(N - 1):
         X_j = X[j, :]
-        k1 = F(T[j], X_j)
-        k2 = F(T[j] + h / 2, X_j + (h / 2) * k1)
-        k3 = F(T[j] + h / 2, X_j + (h / 2) * k2)
-        k4 = F(T[j] + h, X_j + h * k3)
-        X[j + 1, :] = X_j + h * (k1 + 2 * k2 + 2 * k3 + k4) / 6
+        t_half = T[j] + half_h
+        F(T[j], X_j, k1)
+        np.multiply(k1, half_h, out=tmp)
+        tmp += X_j
+        F(t_half, tmp, k2)
+        np.multiply(k2, half_h, out=tmp)
+        tmp += X_j
+        F(t_half, tmp, k3)
+        np.multiply(k3, h, out=tmp)
+        tmp += X_j
+        F(T[j] + h, tmp, k4)
+
+        # X[j + 1] = X_j + h * (k1 + 2 * k2 + 2 * k3 + k4) / 6
+        np.add(k2, k3, out=tmp)
+        tmp *= 2
+        tmp += k1
+        tmp += k4
+        tmp *= sixth_h
+        np.add(X_j, tmp, out=X[j + 1, :])
 
     return X
 
@@ -58,14 +100,109 @@ def single_ruku4(T: np.ndarray, f: Callable, x0 : float|int) -> np.ndarray:
     :param Callable f: function of time and x, f(t, x)
     :param float|int x0: initial condition, x(t=T[0])
 
-    Applies the Runge-Kutta 4 method (readily implemented in ruku4) to a single ODE of the form:
+    Applies the same Runge-Kutta 4 scheme as ruku4 to a single ODE of the form:
     dx(T)/dt = f(T, x(T))
+    It does not call ruku4: since x is a scalar, the steps are computed directly with plain floats.
 
     :return np.ndarray: x, a 1-dimensional numpy array of len N with the values of x at every instant T[j]
     """
-    F = FunctionArray([f])
-    X_0 = np.array([x0])
-    x = ruku4(T, F, X_0)[:, 0]
+    h = float(T[1] - T[0])
+    half_h, sixth_h = h / 2, h / 6
+    t = T.tolist()
+    x = [float(x0)]
+
+    for j in range(len(t) - 1):
+        x_j = x[j]
+        t_half = t[j] + half_h
+        k1 = f(t[j], x_j)
+        k2 = f(t_half, x_j + half_h * k1)
+        k3 = f(t_half, x_j + half_h * k2)
+        k4 = f(t[j + 1], x_j + h * k3)
+        x.append(x_j + sixth_h * (k1 + 2 * (k2 + k3) + k4))
+
+    return np.array(x)
+
+
+def sampled_single_ruku4(T: np.ndarray, f: Callable, u: np.ndarray, x0: float | int) -> np.ndarray:
+    """
+    :param np.ndarray T: time array of len N, defined as the range a:h:b
+    :param Callable f: function of time, x and the input, f(t, x, u)
+    :param np.ndarray u: array of len N with the values of the input at every instant T[j]
+    :param float|int x0: initial condition, x(t=T[0])
+
+    Same as single_ruku4, for an ODE driven by an input known only at the samples T:
+    dx(T)/dt = f(T, x(T), u(T))
+    The input at the half steps is approximated by the mean of its neighbouring samples, so no function has to
+    be evaluated in between.
+
+    :return np.ndarray: x, a 1-dimensional numpy array of len N with the values of x at every instant T[j]
+    """
+    h = float(T[1] - T[0])
+    half_h, sixth_h = h / 2, h / 6
+    t = T.tolist()
+    u = np.asarray(u, dtype=np.float64).tolist()
+    x = [float(x0)]
+
+    for j in range(len(t) - 1):
+        x_j = x[j]
+        t_half = t[j] + half_h
+        u_half = (u[j] + u[j + 1]) / 2
+        k1 = f(t[j], x_j, u[j])
+        k2 = f(t_half, x_j + half_h * k1, u_half)
+        k3 = f(t_half, x_j + half_h * k2, u_half)
+        k4 = f(t[j + 1], x_j + h * k3, u[j + 1])
+        x.append(x_j + sixth_h * (k1 + 2 * (k2 + k3) + k4))
+
+    return np.array(x)
+
+
+def linear_first_order_ODE(T: np.ndarray, u: np.ndarray, tau: float | np.ndarray, x0: float = 0.0) -> np.ndarray:
+    """
+    :param np.ndarray T: time array of len N, defined as the range a:h:b
+    :param np.ndarray u: array of len N with the values of the input at every instant T[j]
+    :param float|np.ndarray tau: time constant of the system
+    :param float x0: initial condition, x(t=T[0])
+
+    Solves exactly the linear first-order ODE
+    tau*dx(T)/dt + x(T) = u(T)
+    assuming u varies linearly between samples. Under that assumption, the ODE reduces to the recurrence
+    x[j+1] = a*x[j] + (1 - a)*u[j] + c*(u[j+1] - u[j])
+    where a = exp(-h/tau) and c = 1 - (tau/h)*(1 - a).
+    The recurrence is evaluated in closed form with cumulative sums instead of stepping through the samples.
+    Several independent systems can be solved at once by giving u of shape (..., N) and/or an array tau
+    that broadcasts against it, e.g. of shape (K, 1).
+
+    :return np.ndarray: x, a numpy array of len N (or of the broadcast shape (..., N)) with the values of x at every
+    instant T[j]
+    """
+    h = float(T[1] - T[0])
+    u = np.asarray(u, dtype=np.float64)
+    shape = np.broadcast_shapes(u.shape, np.shape(tau))
+    u = np.broadcast_to(u, shape)
+    # one time constant per system, kept with a trailing axis of len 1 so it broadcasts along time
+    tau = np.broadcast_to(np.asarray(tau, dtype=np.float64), shape)[..., :1]
+    b = -np.expm1(-h / tau)
+    c = 1 - tau * b / h
+    g = b * u[..., :-1] + c * np.diff(u, axis=-1)
+
+    # Unrolling the recurrence x[j+1] = a*x[j] + g[j] from a sample s gives
+    # x[s+i] = a**i * (x[s] + sum_{k<i} g[s+k]/a**(k+1))
+    # so a whole stretch of samples is one cumulative sum. a**-i grows as exp(i*h/tau), so the samples are
+    # taken in blocks spanning at most 50 time constants, which keeps it well within the float64 range.
+    x = np.empty(shape)
+    x[..., 0] = x0
+    block = int(50 * tau.min() / h)
+    if block < 2:
+        # tau is far below the time step, where a**-i would overflow right away: step the recurrence instead
+        a = 1 - b[..., 0]
+        for j in range(shape[-1] - 1):
+            x[..., j + 1] = a * x[..., j] + g[..., j]
+        return x
+
+    for s in range(0, shape[-1] - 1, block):
+        g_s = g[..., s:s + block]
+        a_i = np.exp(-(h / tau) * np.arange(1, g_s.shape[-1] + 1))
+        x[..., s + 1:s + 1 + g_s.shape[-1]] = a_i * (x[..., s, None] + np.cumsum(g_s / a_i, axis=-1))
     return x
 
 
@@ -90,11 +227,13 @@ def higher_order_ODE(T: np.ndarray, f: Callable, X_0: np.ndarray, v: np.ndarray)
     M = len(X_0)
     if M + 1 != len(v):
         raise ValueError("The dimensions of the coefficients and the initial conditions do not match")
-    F = FunctionArray()
-    for i in range(M - 1):
-        F.append(lambda t, X : X[i+1])
-    F.append(lambda t, X : ( f(t, X[0]) - np.dot(v[:-1], X)) / v[-1])
-    x = ruku4(T, F, X_0)[:, 0]
+
+    def F(t, X, out):
+        out[:-1] = X[1:]
+        out[-1] = (f(t, X[0]) - np.dot(v[:-1], X)) / v[-1]
+        return out
+
+    x = ruku4(T, F, X_0, inplace=True)[:, 0]
     return x
 
 
@@ -140,6 +279,22 @@ def test_single_ruku4() -> None:
     plt.show()
 
 
+def test_linear_first_order_ODE() -> None:
+    """
+    solves the ODE
+    0.5*dx/dt + x = t, x(0) = 0
+    and plots it compared to the analytical solution
+    """
+    T = np.linspace(0, 5, 200)
+    tau = 0.5
+    x = linear_first_order_ODE(T, T, tau)
+
+    plt.plot(T, x, 'r-')
+    plt.plot(T, T - tau + tau*np.exp(-T/tau), 'b--')
+
+    plt.show()
+
+
 def test_higher_order_ODE() -> None:
     """
     solves the order 2 ODE
@@ -161,4 +316,5 @@ def test_higher_order_ODE() -> None:
 if __name__ == '__main__':
     test_ruku4()
     test_single_ruku4()
+    test_linear_first_order_ODE()
     test_higher_order_ODE()
@@ -1,4 +1,4 @@
-from typing import Tuple
+import os
 from ODE_solver import *
 from typing import Callable
 from language_package_manager import LANG_PACK
@@ -8,71 +8,223 @@ UNITS = {'Volume': '$[ml]$',
          'Flux': '$\\left[\\frac{L}{min}\\right]$',
          'Time': '$[s]$'}
 
+# Floating point type of the simulation arrays. Single precision is plenty for plotting;
+# set it back to np.float64 where full precision is needed.
+DTYPE = np.float32
 
-def vol_clamp_sim(time_vector: np.ndarray, capacitance: float, resistance: float, flux: Callable, peep=0.0, *,
-                  pause_lapsus=None, end_time=None, **kwargs) -> Tuple[np.ndarray, ...]:
+# Figures built by the plotting functions, reused when replotting (see _mosaic_figure)
+_FIG_CACHE = {}
+
+
+def _sample_clamp(time_vector: np.ndarray, clamp: Callable | np.ndarray, shape: tuple = ()) -> np.ndarray:
+    """
+    time_vector: array containing the time samples
+    clamp: either a function of time, evaluated on the whole array at once, or its samples over time_vector
+    shape: shape to broadcast the samples against, such as that of array-valued model parameters
+
+    Functions that only take scalars (e.g. lambda t: A*(t_0 < t < t_1)) are detected when calling them with the
+    whole array raises, or returns something that does not broadcast against it, and are then evaluated sample by
+    sample instead. Any TypeError or ValueError raised by that first call is swallowed, so a buggy array-aware
+    function is also silently evaluated sample by sample. A scalar result does broadcast, and is taken as a
+    constant clamp (e.g. lambda t: 0).
+
+    returns: a DTYPE array holding the clamp samples, with time along its last axis. It may be a read-only view of
+    the given samples
+    """
+    if callable(clamp):
+        try:
+            samples = clamp(time_vector)
+            np.broadcast_shapes(np.shape(samples), time_vector.shape)
+        except (TypeError, ValueError):
+            samples = np.frompyfunc(clamp, 1, 1)(time_vector)
+        clamp = samples
+    samples = np.asarray(clamp, dtype=DTYPE)
+    return np.broadcast_to(samples, np.broadcast_shapes(samples.shape, time_vector.shape, shape))
+
+
+def _empty_results(samples: np.ndarray, row: int) -> np.ndarray:
+    """
+    samples: clamp samples of a simulation, as returned by _sample_clamp
+    row: row of the results where the clamp samples belong (0: volume, 1: flux, 2: pressure)
+
+    returns: a new 3 x ... DTYPE array for the volume, flux, and pressure of a simulation, with the clamp samples
+    already copied into their row
+    """
+    results = np.empty((3,) + samples.shape, dtype=DTYPE)
+    results[row] = samples
+    return results
+
+
+def vol_clamp_sim(time_vector: np.ndarray, capacitance: float, resistance: float, flux: Callable | np.ndarray,
+                  peep=0.0, *, pause_lapsus=None, end_time=None, **kwargs) -> np.ndarray:
     """
     Time: array containing the time samples
     capacitance: lung compliance
     resistance: lung flux resistance
-    flux: flux to be applied before the exhalation begins
+    flux: flux to be applied before the exhalation begins, either as a function or already sampled
     peep: positive end-expiratory pressure
     end_time: time when inhalation ends
     pause_lapsus: length of the time interval between inhalation and exhalation
 
-    returns: volume, flux, and pressure for every instant of time
+    capacitance, resistance and the flux samples may also be arrays that broadcast against each other
+    (see sweep_simulation), with time along the last axis.
+
+    returns: a 3 x N array with the volume, flux, and pressure for every instant of time, in that order, so it can be
+    unpacked as volume, flux, pressure = vol_clamp_sim(...)
     """
 
+    # time_vector is not cast to DTYPE: the flux and the phase boundaries are evaluated on the given instants, as
+    # float32 could move a pulse edge lying on a sample by one sample. Only the results are stored in DTYPE
     if end_time is None:
         end_time = time_vector[int(0.6*len(time_vector))]
 
     if pause_lapsus is None:
         pause_lapsus = np.max(time_vector) * 0.1
 
+    # the time vector is uniform and sorted, so instants are located by index instead of boolean masks
+    t_0 = time_vector[0]
+    dt = time_vector[1] - time_vector[0]
+    ex_time = end_time + pause_lapsus
+    end_k = np.searchsorted(time_vector, end_time, side='right')
+    ex_k = np.searchsorted(time_vector, ex_time, side='right')
+
     # first, simulate inhalation
-    flux = np.vectorize(flux)
-    flux = flux(time_vector)
-    flux[time_vector > end_time] = 0.0
+    tau = capacitance * resistance
+    # the three quantities are rows of a single array
+    results = _empty_results(_sample_clamp(time_vector, flux, np.shape(tau)), 1)
+    volume, flux, pressure = results
+    flux[..., end_k:] = 0.0
 
-    # integrate flux to find volume and compute pressure
-    dt = time_vector[1] - time_vector[0]
-    volume = np.cumsum(flux)*dt
-    pressure = resistance * flux + volume / capacitance + peep
+    # after the pause lapsus, exhalation overwrites everything from ex_k on, so the inhalation passes stop there
+    index = min(max(int(round((ex_time - t_0) / dt)), 0), len(time_vector) - 1)
+    n = max(ex_k, index + 1)
 
-    # after the pause lapsus, simulate exhalation
-    ex_time = end_time + pause_lapsus
-    pressure[time_vector > ex_time] = peep
-    index = np.abs(time_vector - ex_time).argmin()
-    v_0 = volume[index]
-    volume[time_vector > ex_time] = single_ruku4(time_vector[time_vector > ex_time],
-                                                 lambda _, v: -(v / capacitance) * 1 / resistance, v_0)
-    flux[time_vector > ex_time] = np.gradient(volume[time_vector > ex_time], dt)
-   
-    return volume, flux, pressure
-
-
-def pressure_clamp_sim(time_array: np.ndarray, compliance: float, resistance: float, pressure_function: Callable,
-                       peep=0.0, **kwargs) -> Tuple[np.ndarray, ...]:
+    # integrate flux to find volume and compute pressure
+    np.cumsum(flux[..., :n], axis=-1, out=volume[..., :n])
+    volume[..., :n] *= dt
+    # pressure = R*flux + V/C + PEEP = (tau*flux + V)/C + PEEP, accumulated in place to avoid temporary arrays
+    p_in = pressure[..., :ex_k]
+    np.multiply(flux[..., :ex_k], tau, out=p_in)
+    p_in += volume[..., :ex_k]
+    p_in *= 1 / capacitance
+    p_in += peep
+
+    # then simulate exhalation
+    pressure[..., ex_k:] = peep
+    v_0 = volume[..., index, None]
+
+    # the exhalation ODE dv/dt = -v/(C*R) is solved exactly by an exponential decay
+    t_ex_arr = time_vector[ex_k:]
+    np.multiply(v_0, np.exp(-(t_ex_arr - t_ex_arr[:1]) / tau), out=volume[..., ex_k:])
+    np.divide(volume[..., ex_k:], -tau, out=flux[..., ex_k:])
+
+    return results
+
+
+def pressure_clamp_sim(time_array: np.ndarray, compliance: float, resistance: float,
+                       pressure_function: Callable | np.ndarray, peep=0.0, *, integrator: str = 'exact',
+                       **kwargs) -> np.ndarray:
     """
     T: array containing the time samples
     C: lung compliance
     R: lung flux resistance
-    P: function representing the pressure to be applied
+    P: function representing the pressure to be applied, or its samples over T
     PEEP: positive end-expiratory pressure
-    returns: volume, flux, and pressure for every instant of time
+    integrator: 'exact' (default) solves the ODE exactly between samples, 'rk4' uses sampled_single_ruku4 (RK4 with
+    the pressure at the half steps averaged from its neighbouring samples), and 'lsoda'/'rk45' use the adaptive
+    solvers of scipy.integrate.solve_ivp, which require scipy
+
+    C, R and the pressure samples may also be arrays that broadcast against each other
+    (see sweep_simulation), with time along the last axis. This is only supported by the exact integrator.
+
+    returns: a 3 x N array with the volume, flux, and pressure for every instant of time, in that order, so it can be
+    unpacked as volume, flux, pressure = pressure_clamp_sim(...)
+    """
+    # the pressure is sampled on the given instants, not on DTYPE ones (see vol_clamp_sim); only the results are DTYPE
+    tau = compliance * resistance
+    # the three quantities are rows of a single array
+    results = _empty_results(_sample_clamp(time_array, pressure_function, np.shape(tau)), 2)
+    volume, flux, pressure = results
+
+    if integrator == 'exact':
+        # R*C*dv/dt + v = C*(P - PEEP) is linear, so it is solved exactly between samples
+        volume[...] = linear_first_order_ODE(time_array, compliance * (pressure - peep), tau)
+    elif integrator in ('rk4', 'lsoda', 'rk45'):
+        if pressure.ndim != 1:
+            raise ValueError(f"The {integrator} integrator only solves a single simulation, use 'exact' instead")
+        # dv/dt = (C*(P - PEEP) - v)/(R*C) = (P - PEEP)/R - v/(R*C), with the divisions done once
+        inv_r, inv_tau = 1 / float(resistance), 1 / float(tau)
+        if integrator == 'rk4':
+            # RK4 only needs the pressure at the samples and half steps, so it is fed the samples directly
+            dv_dt = lambda t, v, p: p * inv_r - v * inv_tau
+            volume[...] = sampled_single_ruku4(time_array, dv_dt, pressure - peep, 0.0)
+        else:
+            # the adaptive solvers choose their own steps, so the pressure is interpolated from its samples
+            # in float64 arrays, which np.interp takes as they are instead of converting them on every call
+            T = np.asarray(time_array, dtype=np.float64)
+            P = np.asarray(pressure - peep, dtype=np.float64)
+            dv_dt = lambda t, v: np.interp(t, T, P) * inv_r - v * inv_tau
+            try:
+                from scipy.integrate import solve_ivp
+            except ImportError as error:
+                raise ImportError(f"The {integrator} integrator requires scipy, an optional dependency of "
+                                  f"LungoVax: pip install scipy") from error
+            solution = solve_ivp(dv_dt, (T[0], T[-1]), [0.0], method=integrator.upper(), t_eval=T,
+                                 rtol=1e-6, atol=1e-9)
+            if not solution.success:
+                raise RuntimeError(f"The {integrator} integrator failed: {solution.message}")
+            volume[...] = solution.y[0]
+    else:
+        raise ValueError(f"Unknown integrator: {integrator}")
+    # flux = (P - PEEP - V/C)/R
+    np.subtract(pressure, peep, out=flux)
+    flux -= volume / compliance
+    flux /= resistance
+    return results
+
+
+def sweep_simulation(sim_func: Callable, time_vector: np.ndarray, capacitances: np.ndarray, resistances: np.ndarray,
+                     clamp: Callable | np.ndarray, **kwargs) -> np.ndarray:
+    """
+    sim_func: simulation to run, either vol_clamp_sim or pressure_clamp_sim
+    time_vector: array containing the time samples
+    capacitances, resistances: sequences of K values, one pair for each simulation
+    clamp: clamp function or samples shared by all simulations, or a K x N array with one row per simulation
+    kwargs: any other argument for sim_func
+
+    Runs the K independent simulations at once, broadcasting along the first axis instead of looping over them.
+
+    returns: a 3 x K x N array with the volume, flux, and pressure of the simulations, one row per simulation in each
+    """
+    capacitances = np.asarray(capacitances, dtype=np.float64)[:, None]
+    resistances = np.asarray(resistances, dtype=np.float64)[:, None]
+    return sim_func(time_vector, capacitances, resistances, clamp, **kwargs)
+
+
+def _mosaic_figure(name: str, mosaic: list, show: bool) -> tuple:
     """
-    pressure_function = np.vectorize(pressure_function)
-    pressure = pressure_function(time_array)
+    name: key of the figure in the cache
+    mosaic: layout of the axes, as accepted by plt.subplot_mosaic
+    show: whether the figure is going to be shown
 
-    def p_func(t):
-        return pressure[np.abs(time_array - t).argmin()]
+    When the figure is not going to be shown (e.g. it is embedded in the GUI), the one built by the previous call
+    is reused, as long as the matplotlib style has not changed since. Rebuilding the whole layout is the slowest
+    part of replotting.
 
-    def flux(t, v):
-        return (p_func(t) - v / compliance - peep) * 1 / resistance
+    returns: the figure, labelled with name, its axes, and whether they were just created
+    """
+    style = plt.rcParams['figure.facecolor']
+    cached = _FIG_CACHE.get(name)
+    if not show and cached is not None and cached[0] == style:
+        return cached[1], cached[2], False
 
-    volume = single_ruku4(time_array, flux, 0)
-    flux = np.gradient(volume, time_array)
-    return volume, flux, pressure
+    plt.close()
+    fig, axs = plt.subplot_mosaic(mosaic)
+    # the name tells embedders which earlier figure a new one replaces
+    fig.set_label(name)
+    if not show:
+        _FIG_CACHE[name] = (style, fig, axs)
+    return fig, axs, True
 
 
 def plot_vfp(time_array: np.ndarray, volume: np.ndarray, flux: np.ndarray, pressure: np.ndarray,
@@ -81,31 +233,42 @@ def plot_vfp(time_array: np.ndarray, volume: np.ndarray, flux: np.ndarray, press
         T: array representing time
         volume, flux, pressure: arrays representing each quantity for every instant T[i]
         plots volume, flux, and pressure against time
+        With show=False, the returned figure is shared: later calls with show=False redraw the same figure
     """
-    plt.close()
-    fig, axs = plt.subplot_mosaic(
+    fig, axs, new = _mosaic_figure(
+        'vfp',
         [["top left", "right column"],
          ["middle left", "right column"],
-         ["bottom left", "right column"]]
+         ["bottom left", "right column"]],
+        show
     )
-
-    axs["top left"].plot(time_array, volume, color='blue')
+    if new:
+        axs["top left"].plot([], [], color='blue')
+        axs["middle left"].plot([], [], color='green')
+        axs["bottom left"].plot([], [], color='deeppink')
+        axs["right column"].plot([], [], color='r', linestyle='-')
+        axs["right column"].axhline(y=0, color='y', linestyle='-')
+
+    axs["top left"].lines[0].set_data(time_array, volume)
     axs["top left"].set_ylabel(f"${lang_pack['VOLUME_LABEL']}$ {UNITS['Volume']}")
 
-    axs["middle left"].plot(time_array, flux, color='green')
+    axs["middle left"].lines[0].set_data(time_array, flux)
     axs["middle left"].set_ylabel(f"${lang_pack['FLUX_LABEL']}$ {UNITS['Flux']}")
 
-    axs["bottom left"].plot(time_array, pressure, color='deeppink')
+    axs["bottom left"].lines[0].set_data(time_array, pressure)
     axs["bottom left"].set_ylabel(f"${lang_pack['PRESSURE_LABEL']}$ {UNITS['Pressure']}")
     axs["bottom left"].set_xlabel(f"${lang_pack['TIME_LABEL']}$ {UNITS['Time']}")
 
-    axs["right column"].plot(volume, flux, color='r', linestyle='-')
+    axs["right column"].lines[0].set_data(volume, flux)
     axs["right column"].set_xlabel(f"${lang_pack['VOLUME_LABEL']}$ {UNITS['Volume']}")
     axs["right column"].set_ylabel(f"${lang_pack['FLUX_LABEL']}$ {UNITS['Flux']}")
-    axs["right column"].axhline(y=0, color='y', linestyle='-')
+
+    for ax in axs.values():
+        ax.relim()
+        ax.autoscale_view()
 
     # Tight layout
-    plt.tight_layout()
+    fig.tight_layout()
 
     if show:
         plt.show()
@@ -119,36 +282,52 @@ def comparative_plot(time_vector: np.ndarray, vol1: np.ndarray, vol2: np.ndarray
         vol1, flux1, press1: arrays representing initial volume, flux, and pressure for every instant T[i]
         vol2, flux2, press2: arrays representing final volume, flux, and pressure for every instant T[i]
         plots initial and final volume, flux, and pressure against time, superimposed.
+        With show=False, the returned figure is shared: later calls with show=False redraw the same figure
     """
-    plt.close()
-    fig, axs = plt.subplot_mosaic([['top left', 'right'],
-                                   ['medium left', 'right'],
-                                   ['bottom left', 'right']])
+    fig, axs, new = _mosaic_figure('comparative',
+                                   [['top left', 'right'],
+                                    ['medium left', 'right'],
+                                    ['bottom left', 'right']],
+                                   show)
+    if new:
+        axs["top left"].plot([], [], '-b', [], [], '-.b')
+        axs["medium left"].plot([], [], '-g', [], [], '-.g')
+        axs["bottom left"].plot([], [], color='deeppink')
+        axs["bottom left"].plot([], [], linestyle='-.', color='deeppink')
+        axs["right"].plot([], [], '-r', [], [], '-.r')
+        axs["right"].axhline(y=0, color='y', linestyle='-')
+
     # Comparative values display in right and left 
     # Setting x axes as time
     axs["bottom left"].set_xlabel(f"${lang_pack['TIME_LABEL']}$ {UNITS['Time']}")
     
     # Plotting volume comparison (time)
-    axs["top left"].plot(time_vector, vol1, '-b', time_vector, vol2, '-.b')
+    axs["top left"].lines[0].set_data(time_vector, vol1)
+    axs["top left"].lines[1].set_data(time_vector, vol2)
     axs["top left"].set_ylabel(f"${lang_pack['VOLUME_LABEL']}$ {UNITS['Volume']}")
 
     # Plotting flux comparison (time)
-    axs["medium left"].plot(time_vector, flux1, '-g', time_vector, flux2, '-.g')
+    axs["medium left"].lines[0].set_data(time_vector, flux1)
+    axs["medium left"].lines[1].set_data(time_vector, flux2)
     axs["medium left"].set_ylabel(f"${lang_pack['FLUX_LABEL']}$ {UNITS['Flux']}")
     
     # Plotting pressure comparison (time)
-    axs["bottom left"].plot(time_vector, press1, color='deeppink')
-    axs["bottom left"].plot(time_vector, press2, linestyle='-.', color='deeppink')
+    axs["bottom left"].lines[0].set_data(time_vector, press1)
+    axs["bottom left"].lines[1].set_data(time_vector, press2)
     axs["bottom left"].set_ylabel(f"${lang_pack['PRESSURE_LABEL']}$ {UNITS['Pressure']}")
 
     # plotting volume vs flux (comparative) where the flux is considered to be positive inwards
-    axs["right"].plot(vol1, flux1, '-r', vol2, flux2, '-.r')
+    axs["right"].lines[0].set_data(vol1, flux1)
+    axs["right"].lines[1].set_data(vol2, flux2)
     axs["right"].set_xlabel(f"${lang_pack['VOLUME_LABEL']}$ {UNITS['Volume']}")
     axs["right"].set_ylabel(f"${lang_pack['FLUX_LABEL']}$ {UNITS['Flux']}")
-    axs["right"].axhline(y=0, color='y', linestyle='-')
-    
+
+    for ax in axs.values():
+        ax.relim()
+        ax.autoscale_view()
+
     # Tight layout
-    plt.tight_layout()
+    fig.tight_layout()
 
     if show:
         plt.show()
@@ -161,11 +340,11 @@ def ideal_pulse_func(start: float, end: float, amplitude: float) -> Callable:
     end: t_0 + d/2
     A: amplitude
 
-    returns a function that represents the pulse function A*Pi( (t-t_0)/d ) evaluated at time=t
+    returns a function that represents the pulse function A*Pi( (t-t_0)/d ) evaluated at time=t, where t may be
+    a scalar or a whole array of time samples
     """
-    t_0 = (start + end)/2
-    d = end - start
-    return lambda t: amplitude * int(np.abs((t - t_0) / d) < 1 / 2)
+    # |t - t_0|/d < 1/2 is the open interval (start, end), so the pulse is a single boolean mask
+    return lambda t: np.where((start < t) & (t < end), amplitude, 0.0)
 
 
 def smooth_pulse_func(start: float, end: float, amplitude: float) -> Callable:
@@ -174,11 +353,22 @@ def smooth_pulse_func(start: float, end: float, amplitude: float) -> Callable:
     end: t_0 + d/2
     A: amplitude
 
-    returns a function that represents a smoothed out version of the pulse function A*Pi((t-t_0)/d) evaluated at time=t
+    returns a function that represents a smoothed out version of the pulse function A*Pi((t-t_0)/d) evaluated at time=t,
+    where t may be a scalar or a whole array of time samples
     """
-    t_0 = (start + end)/2
-    d = end - start
-    return lambda t: amplitude / np.sqrt(1 + ((t - t_0) / (d / 2)) ** 40)
+    t_0 = float(start + end)/2
+    k = 2 / float(end - start)
+
+    def smooth_pulse(t):
+        # A/sqrt(1 + x**40), with x = (t - t_0)/(d/2). Past |x| = 8 the pulse is below A*1e-18, so x is clipped
+        # there to keep x**40 finite in float32, and the power is taken by squaring, much faster than np.power:
+        # x**40 = (x**16)**2 * x**8, with x**16 = x**8 * x**8
+        x2 = np.minimum(np.abs((t - t_0) * k), 8.0) ** 2
+        x8 = (x2 * x2) ** 2
+        x16 = x8 * x8
+        return amplitude / np.sqrt(1 + x16 * x16 * x8)
+
+    return smooth_pulse
 
 
 def ripply_pulse_func(start: float, end: float, amplitude: float, iterations: int, length: float) -> Callable:
@@ -189,40 +379,43 @@ def ripply_pulse_func(start: float, end: float, amplitude: float, iterations: in
     N: number of iterations for the approximation
     length: maximum window of time to be considered
 
-    returns a function that represents a rippled version of the pulse function A*Pi( (t-t_0)/d ) evaluated at time=t
+    returns a function that represents a rippled version of the pulse function A*Pi( (t-t_0)/d ) evaluated at time=t,
+    where t may be a scalar or a whole array of time samples
     """
     t_0 = (start + end)/2
     d = end - start
     f_0 = 1 / length
 
+    # the Fourier coefficients do not depend on t, so they are computed only once. They are real and even in n,
+    # so the series is the cosine series x_0 + 2*sum_{n>=1} x_n*cos(n*w_0*(t - t_0))
+    w_0 = 2 * np.pi * f_0
+    n = np.arange(iterations + 1)
+    c_n = amplitude * d * f_0 * np.sinc(n * f_0 * d)
+    c_n[1:] *= 2
+
     def fourier_pulse(t):
-        result = 0
-        w_0 = 2 * np.pi * f_0
-        for n in range(-iterations, iterations + 1):
-            x_n = amplitude * d * f_0 * np.sinc(np.array(n * f_0 * d)) * np.exp(-1j * n * w_0 * t_0)
-            result += np.real(x_n * np.exp(1j * n * w_0 * t))
-        return result
+        # Clenshaw's recurrence sums the cosine series with a single cos evaluation per sample, instead of a
+        # complex exponential per harmonic and sample
+        x = 2 * np.cos(w_0 * (np.asarray(t) - t_0))
+        b_1, b_2 = 0.0, 0.0
+        for c in c_n[:0:-1]:
+            b_1, b_2 = c + x * b_1 - b_2, b_1
+        return c_n[0] + x / 2 * b_1 - b_2
 
     return fourier_pulse
 
 
 def sinusoidal_func(amplitude: float, phase: float, freq: float) -> Callable:
     """
-    Generates a sinusoidal function with the specified parameters
+    Generates a sinusoidal function with the specified parameters, which may be evaluated at a scalar time or at a
+    whole array of time samples
     """
-    return lambda t: amplitude*np.sin(2*np.pi*freq*t + phase) + amplitude
-
-
-def clamp_test():
-    def run_both_tests(t_test, c_test, r_test, func, end_time=None, pause_lapsus=None):
-        volume, flux, pressure = pressure_clamp_sim(t_test, c_test, r_test, func)
-        plot_vfp(time_array, volume, flux, pressure)
+    # plain floats, so the result takes the precision of t rather than that of the parameters
+    amplitude, phase, w = float(amplitude), float(phase), float(2*np.pi*freq)
+    return lambda t: amplitude*(np.sin(w*t + phase) + 1)
 
-        volume, flux, pressure = vol_clamp_sim(t_test, c_test, r_test, func,
-                                               end_time=end_time,
-                                               pause_lapsus=pause_lapsus)
-        plot_vfp(time_array, volume, flux, pressure)
 
+def clamp_test(show=True):
     time_array = np.linspace(0, 15, 1500)
     compliance = 100
     resistance = 0.01
@@ -230,33 +423,47 @@ def clamp_test():
     start = time_array[len(time_array)//3]
     end = time_array[len(time_array)//2]
     amplitude = 5.0
+    clamp_funcs, end_times, pauses = [], [], []
 
     # Test for hard pulse with a variable amplitude
-    clamp_func = ideal_pulse_func(start, end, amplitude)
-    run_both_tests(time_array, compliance, resistance, clamp_func)
+    clamp_funcs.append(ideal_pulse_func(start, end, amplitude))
+    end_times.append(None)
+    pauses.append(None)
 
     # Test for a sinusoidal pressure with a variable freq and Amp
     amplitude = 3.0
     freq = 10/np.max(time_array)
-    clamp_func = sinusoidal_func(amplitude, 0, freq)
-    run_both_tests(time_array, compliance, resistance, clamp_func)
+    clamp_funcs.append(sinusoidal_func(amplitude, 0, freq))
+    end_times.append(None)
+    pauses.append(None)
 
     # Test for a smooth pulse
-    clamp_func = smooth_pulse_func(start, end, amplitude)
-    pause = 2.0
-    end_time = end + pause
-    run_both_tests(time_array, compliance, resistance, clamp_func, end_time=end_time, pause_lapsus=pause)
+    clamp_funcs.append(smooth_pulse_func(start, end, amplitude))
+    pauses.append(2.0)
+    end_times.append(end + pauses[-1])
 
     # Test for a hard pulse
     n_iter = 20
     length = time_array[-1]
-    clamp_func = ripply_pulse_func(start, end, amplitude, n_iter, length)
-    pause = 2.0
-    end_time = end + pause
-    run_both_tests(time_array, compliance, resistance, clamp_func, end_time=end_time, pause_lapsus=pause)
+    clamp_funcs.append(ripply_pulse_func(start, end, amplitude, n_iter, length))
+    pauses.append(2.0)
+    end_times.append(end + pauses[-1])
+
+    # every test uses the same clamp samples for both simulations. The pressure clamp ones share all their other
+    # parameters too, so they run together, one per row
+    samples = np.stack([_sample_clamp(time_array, func) for func in clamp_funcs])
+    volumes, fluxes, pressures = pressure_clamp_sim(time_array, compliance, resistance, samples)
+
+    for i in range(len(clamp_funcs)):
+        plot_vfp(time_array, volumes[i], fluxes[i], pressures[i], show)
+
+        volume, flux, pressure = vol_clamp_sim(time_array, compliance, resistance, samples[i],
+                                               end_time=end_times[i],
+                                               pause_lapsus=pauses[i])
+        plot_vfp(time_array, volume, flux, pressure, show)
 
 
-def comp_test():
+def comp_test(show=True):
     compliance = 10
     resistance = 0.1
     time_array = np.linspace(0, 15, 1500)
@@ -267,11 +474,17 @@ def comp_test():
 
     flux_ideal = ideal_pulse_func(start, end, amplitude)
     flux_soft = smooth_pulse_func(start, end, amplitude)
-    v1, f1, p1 = pressure_clamp_sim(time_array, compliance, resistance, flux_ideal)
-    v2, f2, p2 = pressure_clamp_sim(time_array, compliance, resistance, flux_soft)
-    comparative_plot(time_array, v1, v2, f1, f2, p1, p2)
+    # both simulations run together, one per row
+    samples = np.stack([flux_ideal(time_array), flux_soft(time_array)])
+    (v1, v2), (f1, f2), (p1, p2) = sweep_simulation(pressure_clamp_sim, time_array, [compliance] * 2,
+                                                    [resistance] * 2, samples)
+    comparative_plot(time_array, v1, v2, f1, f2, p1, p2, show)
 
 
 if __name__ == '__main__':
-    clamp_test()
-    # comp_test()
+    # LUNGOVAX_NOGUI=1 runs the tests headless, reusing a single figure, e.g. to time the simulations
+    show = not os.environ.get('LUNGOVAX_NOGUI')
+    if not show:
+        plt.switch_backend('Agg')
+    clamp_test(show)
+    # comp_test(show)
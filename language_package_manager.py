@@ -1,12 +1,17 @@
 import json
+import os
 
 
-EN_PACK_PATH = r'./assets/language_packages/lang_en.json'
-ES_PACK_PATH = r'./assets/language_packages/lang_es.json'
+PACKAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'language_packages')
+EN_PACK_PATH = os.path.join(PACKAGES_DIR, 'lang_en.json')
+ES_PACK_PATH = os.path.join(PACKAGES_DIR, 'lang_es.json')
 LANG_LIST_SF = ['en', 'es']
 LANG_DICTIONARY_PATHS = {'en': EN_PACK_PATH,
                          'es': ES_PACK_PATH}
 
+# Language packages already read from disk, by language
+_CACHE: dict[str, dict] = {}
+
 
 def get_system_language():
     import locale
@@ -22,11 +27,14 @@ def get_system_language():
 def get_lang_package(lang: None | str = None):
     if lang is None:
         lang = get_system_language()
+    if lang in _CACHE:
+        return _CACHE[lang]
     if lang not in LANG_LIST_SF:
         raise NotImplementedError(f'Language {lang} is nor supported.')
     lang_path = LANG_DICTIONARY_PATHS[lang]
     with open(lang_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+        _CACHE[lang] = json.load(f)
+    return _CACHE[lang]
 
 
 LANG_PACK = get_lang_package()